@@ -1,27 +1,67 @@
 import numpy as np
 import matplotlib.pyplot as pl
 import pandas as pd
+import openpyxl
+from collections import defaultdict
 
-sheets = pd.read_excel('Family Predictions 2022.xlsx', sheet_name=None)
-questions = sheets.pop('Main')
-player_sheets = sheets
-player_sheets.keys()
-questions['ID'] = questions['ID'].astype(int)
-questions.set_index('ID')
-questions = questions.drop(['Clarifications', 'Outcome', 'Outcome comments', 'Outcome supporting link', 'ID'], axis=1)
-guesses = {k: player_sheets[k]['Probability (0.0 to 1.0)'] for k in player_sheets}
-guesses = pd.DataFrame(data=guesses)
-people = list(guesses.columns)
-X = guesses.values.T
+drop_cols = {'Clarifications', 'Outcome', 'Outcome comments', 'Outcome supporting link', 'ID'}
+prob_col = 'Probability (0.0 to 1.0)'
+
+# stream only the cells we need rather than materialising every sheet
+wb = openpyxl.load_workbook('Family Predictions 2022.xlsx', read_only=True, data_only=True)
+ws = wb['Main']
+ws.reset_dimensions()  # the stored <dimension> can be stale; pandas ignores it too
+main_rows = list(ws.iter_rows(values_only=True))
+while main_rows and all(v is None for v in main_rows[-1]):
+    main_rows.pop()
+# rows come back ragged: trim trailing empty columns and pad the rest to one width
+width = max(max((i + 1 for i, v in enumerate(r) if v is not None), default=0) for r in main_rows)
+main_rows = [(tuple(r) + (None,) * width)[:width] for r in main_rows]
+
+# name headers like read_excel: 'Unnamed: N' for blanks, 'x.1', 'x.2' for repeats
+header = []
+counts = defaultdict(int)
+for i, c in enumerate(main_rows[0]):
+    c = f'Unnamed: {i}' if c is None else c
+    n = counts[c]
+    while n:
+        counts[c] = n + 1
+        c = f'{c}.{n}'
+        n = counts[c]
+    counts[c] = n + 1
+    header.append(c)
+
+# ID check: fails loudly on a missing or non-integer ID
+pd.Series([r[header.index('ID')] for r in main_rows[1:]]).astype(int)
+
+keep = [i for i, c in enumerate(header) if c not in drop_cols]
+questions = pd.DataFrame([[r[i] for i in keep] for r in main_rows[1:]],
+                         columns=[header[i] for i in keep])
+n_questions = len(questions)
+
+people = [k for k in wb.sheetnames if k != 'Main']
+people_arr = np.array(people)
+X = np.full((len(people), n_questions), np.nan)
+for i, k in enumerate(people):
+    ws = wb[k]
+    ws.reset_dimensions()
+    idx = next(ws.iter_rows(max_row=1, values_only=True)).index(prob_col) + 1
+    vals = [v for (v,) in ws.iter_rows(min_row=2, min_col=idx, max_col=idx, values_only=True)]
+    if any(v is not None for v in vals[n_questions:]):
+        raise ValueError(f'{k} has probabilities past the last question in Main')
+    # X starts as NaN, so a sheet shorter than Main leaves its missing answers as NaN
+    vals = vals[:n_questions]
+    X[i, :len(vals)] = [np.nan if v is None else v for v in vals]
+wb.close()
 X.shape
 
 # extrema
 idx_min = np.argmin(X, axis=0)
 idx_max = np.argmax(X, axis=0)
-idx_min_lbl = [people[i] for i in idx_min]
-idx_max_lbl = [people[i] for i in idx_max]
-idx_min_vals = np.amin(X, axis=0)
-idx_max_vals = np.amax(X, axis=0)
+idx_min_lbl = people_arr[idx_min]
+idx_max_lbl = people_arr[idx_max]
+idx_min_vals = np.take_along_axis(X, idx_min[None, :], axis=0).ravel()
+idx_max_vals = np.take_along_axis(X, idx_max[None, :], axis=0).ravel()
 
 d = {'min': idx_min_vals, 'min_person': idx_min_lbl, 'prediction': questions['Prediction'], 'max': idx_max_vals, 'max_person': idx_max_lbl}
 df = pd.DataFrame(data=d)
@@ -32,20 +72,21 @@ df
 def entropy(x):
     return np.sum(x * np.log2(x), axis=-1)
 
-X_soft = np.copy(X)
-X_soft[X==0.0] += 1e-20
-X_soft[X==1.0] -= 1e-20
+bad = (X < 0.0) | (X > 1.0)
+if bad.any():
+    raise ValueError(f'probabilities outside [0, 1] for {people_arr[bad.any(axis=1)].tolist()}')
+X_soft = np.clip(X, 1e-20, 1.0)
 e = entropy(X_soft)
 
 idx = np.argsort(e)
-res = list(zip(e[idx], np.array(people)[idx]))
+res = list(zip(e[idx], people_arr[idx]))
 res
 
 # some heuristics for cinfidenc
 # average distance from 0.5
 d = np.mean(np.abs(0.5 - X), axis=-1)
 idx = np.argsort(d)
-res = list(zip(d[idx], np.array(people)[idx]))
+res = list(zip(d[idx], people_arr[idx]))
 
 
 